@@ -0,0 +1,71 @@
+"""順位変動分析のベンチマーク（合成データ）.
+
+実行: uv run python -m benchmarks.bench_analytics [--rows 1000000] [--series 2000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.analytics import compute_rank_summaries, summaries_to_records
+
+
+def make_history(rows: int, series: int, seed: int = 0) -> pd.DataFrame:
+    """商品×キーワード×デバイスが series 系列ある合成履歴を作る.
+
+    2 時間間隔で収集した想定。約 3 割を圏外（None）にする。
+    """
+    rng = np.random.default_rng(seed)
+    runs = -(-rows // series)
+    series_idx = np.repeat(np.arange(series), runs)[:rows]
+    run_idx = np.tile(np.arange(runs), series)[:rows]
+
+    ranks = rng.integers(1, 46, size=rows).astype(float)
+    ranks[rng.random(rows) < 0.3] = np.nan
+
+    pairs = series_idx // 2
+    history = pd.DataFrame({
+        "product_id": pd.Series(pairs % max(series // 20, 1)).map("product-{}".format),
+        "keyword_id": pd.Series(pairs).map("keyword-{}".format),
+        "device": np.where(series_idx % 2 == 0, "pc", "sp"),
+        "rank": pd.array(ranks, dtype="Int64"),
+        "searched_at": (
+            pd.Timestamp("2026-01-01", tz="UTC") + pd.to_timedelta(run_idx * 2, unit="h")
+        ).strftime("%Y-%m-%dT%H:%M:%S+00:00"),
+    })
+    # DB からの取得順はソートされていない前提
+    return history.sample(frac=1.0, random_state=seed).reset_index(drop=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--series", type=int, default=2_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    history = make_history(args.rows, args.series)
+    print(f"rows={len(history):,}, series={args.series:,}")
+
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        summaries = compute_rank_summaries(history)
+        timings.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    records = summaries_to_records(summaries, pd.Timestamp.now(tz="UTC").isoformat())
+    to_records = time.perf_counter() - start
+
+    best = min(timings)
+    print(f"compute_rank_summaries: best={best:.3f}s ({len(history) / best:,.0f} rows/s)")
+    print(f"summaries_to_records:   {to_records:.3f}s ({len(records):,} records)")
+    print(summaries["movement"].value_counts().to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""順位変動分析モジュール.
+
+rankings の履歴を NumPy / pandas の配列に載せ、商品×キーワード×デバイス単位で
+以下をベクトル化して計算する（ダッシュボードの D-04 変動フィルタ・D-05 推移グラフ用）。
+
+  - 最新順位
+  - 窓ごとの順位差分（収集回数単位。正の値 = 順位上昇）
+  - 直近の連続圏外回数
+  - 変動区分（up / down / flat）
+
+窓は定期実行の回数で数えるため、オンデマンド収集の行（source = on_demand）は除外する。
+行ごとのループは使わず、ソート済み配列上のインデックス演算だけで集計する。
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.config import ANALYTICS_WINDOWS, MOVEMENT_WINDOW
+from src.models import SOURCE_ON_DEMAND
+
+_KEYS = ("product_id", "keyword_id", "device")
+
+MOVEMENT_UP = "up"
+MOVEMENT_DOWN = "down"
+MOVEMENT_FLAT = "flat"
+
+
+def _summary_columns(windows: Sequence[int]) -> list[str]:
+    return [
+        *_KEYS,
+        "latest_rank",
+        "latest_searched_at",
+        *(f"delta_{w}" for w in windows),
+        "out_of_rank_streak",
+        "movement",
+    ]
+
+
+def compute_rank_summaries(
+    history: pd.DataFrame,
+    windows: Sequence[int] = ANALYTICS_WINDOWS,
+    movement_window: int = MOVEMENT_WINDOW,
+) -> pd.DataFrame:
+    """順位履歴から商品×キーワード×デバイスごとのサマリを計算する.
+
+    Args:
+        history: rankings の行（product_id, keyword_id, device, rank, searched_at, source）。
+            source が on_demand の行は無視する
+        windows: 差分を計算する窓（何回前の収集と比較するか）
+        movement_window: 変動区分の判定に使う窓。windows に含まれている必要がある
+
+    Returns:
+        1 行 = 1 (product_id, keyword_id, device) の DataFrame。
+        delta_{w} は「w 回前の順位 - 最新順位」で、どちらかが圏外・履歴不足なら欠損。
+        変動区分は圏外を最下位とみなして判定し、比較対象がなければ flat。
+    """
+    if movement_window not in windows:
+        raise ValueError(
+            f"movement_window={movement_window} が windows={tuple(windows)} に含まれていません"
+        )
+
+    columns = _summary_columns(windows)
+    if "source" in history.columns:
+        history = history[history["source"] != SOURCE_ON_DEMAND]
+    if history.empty:
+        return pd.DataFrame(columns=columns)
+
+    # キーを整数コードに変換し、(キー, searched_at) 順に並べる
+    codes = [pd.factorize(history[key], sort=False) for key in _KEYS]
+    searched_at = pd.to_datetime(
+        history["searched_at"], utc=True, format="ISO8601"
+    ).dt.tz_localize(None).to_numpy(dtype="datetime64[ns]")
+    order = np.lexsort((
+        searched_at,
+        codes[2][0], codes[1][0], codes[0][0],
+    ))
+
+    key_codes = [c[0][order] for c in codes]
+    ranks = pd.to_numeric(history["rank"], errors="coerce").to_numpy(
+        dtype=float, na_value=np.nan
+    )[order]
+    times = searched_at[order]
+    n = len(ranks)
+
+    # グループ（キーが連続する区間）の先頭・末尾インデックス
+    boundary = np.zeros(n, dtype=bool)
+    boundary[0] = True
+    for kc in key_codes:
+        boundary[1:] |= kc[1:] != kc[:-1]
+    starts = np.flatnonzero(boundary)
+    ends = np.append(starts[1:], n) - 1
+
+    latest = ranks[ends]
+    latest_out = np.isnan(latest)
+
+    summary = {
+        key: codes[i][1].take(key_codes[i][ends]) for i, key in enumerate(_KEYS)
+    }
+    summary["latest_rank"] = pd.array(latest, dtype="Int64")
+    summary["latest_searched_at"] = pd.DatetimeIndex(times[ends]).tz_localize("UTC")
+
+    movement = np.full(len(ends), MOVEMENT_FLAT, dtype=object)
+    for w in windows:
+        prev_idx = ends - w
+        has_prev = prev_idx >= starts
+        prev = np.where(has_prev, ranks[np.maximum(prev_idx, 0)], np.nan)
+        summary[f"delta_{w}"] = pd.array(prev - latest, dtype="Int64")
+
+        if w == movement_window:
+            # 圏外は +inf（最下位）として比較する
+            prev_cmp = np.where(has_prev, np.where(np.isnan(prev), np.inf, prev), np.nan)
+            latest_cmp = np.where(latest_out, np.inf, latest)
+            movement[latest_cmp < prev_cmp] = MOVEMENT_UP
+            movement[latest_cmp > prev_cmp] = MOVEMENT_DOWN
+
+    # 最後に圏内だった位置から末尾までの距離 = 連続圏外回数
+    in_rank_pos = np.where(np.isnan(ranks), -1, np.arange(n))
+    last_in_rank = np.maximum.reduceat(in_rank_pos, starts)
+    summary["out_of_rank_streak"] = ends - np.maximum(last_in_rank, starts - 1)
+    summary["movement"] = movement
+
+    return pd.DataFrame(summary, columns=columns)
+
+
+def summaries_to_records(summaries: pd.DataFrame, computed_at: str) -> list[dict]:
+    """サマリ DataFrame を rank_summaries テーブル用のレコードに変換する.
+
+    delta_{w} 列は {"<w>": int | None} の deltas にまとめる。
+    """
+    delta_columns = [c for c in summaries.columns if c.startswith("delta_")]
+    records = []
+    for row in summaries.itertuples(index=False):
+        row = row._asdict()
+        latest_rank = row["latest_rank"]
+        records.append({
+            "product_id": row["product_id"],
+            "keyword_id": row["keyword_id"],
+            "device": row["device"],
+            "latest_rank": None if pd.isna(latest_rank) else int(latest_rank),
+            "latest_searched_at": pd.Timestamp(row["latest_searched_at"]).isoformat(),
+            "deltas": {
+                c.removeprefix("delta_"): None if pd.isna(row[c]) else int(row[c])
+                for c in delta_columns
+            },
+            "out_of_rank_streak": int(row["out_of_rank_streak"]),
+            "movement": row["movement"],
+            "computed_at": computed_at,
+        })
+    return records
@@ -0,0 +1,172 @@
+"""検索結果キャッシュモジュール.
+
+(正規化済みクエリ, デバイス) ごとにパース済みの検索結果を TTL 付きで保持する。
+オンデマンド収集と定期実行は別プロセスで動くため、JSON ファイルに保存して共有する。
+保存時はファイルを読み直してマージし、一意な一時ファイルから置換する。
+ファイルロックは取らないため、複数プロセスがほぼ同時に保存すると後から書いた側が
+先の側の新しいエントリを上書きすることがある。失われても次回の検索が 1 回増えるだけ。
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import asdict
+from pathlib import Path
+
+from src.keywords import normalize_keyword
+from src.models import SearchResult
+
+logger = logging.getLogger(__name__)
+
+
+class SearchResultCache:
+    """TTL とエントリ数上限を持つ検索結果キャッシュ（LRU で追い出し）.
+
+    Args:
+        ttl: 有効期間（秒）
+        max_entries: 保持するエントリ数の上限
+        path: 永続化先の JSON ファイル。None ならメモリ上のみ
+        clock: 現在時刻（UNIX 秒）を返す関数。プロセス間で共有するため壁時計を使う
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        max_entries: int,
+        path: Path | None = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.path = path
+        self._clock = clock
+        # key -> (保存時刻, 検索結果)
+        self._entries: OrderedDict[str, tuple[float, list[SearchResult]]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _key(query: str, device: str) -> str:
+        return f"{device}:{normalize_keyword(query)}"
+
+    def get(self, query: str, device: str) -> list[SearchResult] | None:
+        """有効なキャッシュがあれば検索結果を返す。なければ None."""
+        entry = self.lookup(query, device)
+        return None if entry is None else entry[1]
+
+    def lookup(self, query: str, device: str) -> tuple[float, list[SearchResult]] | None:
+        """有効なキャッシュがあれば (保存時刻, 検索結果) を返す。なければ None."""
+        key = self._key(query, device)
+        entry = self._entries.get(key)
+        if entry is not None and self._clock() - entry[0] >= self.ttl:
+            del self._entries[key]
+            self.expirations += 1
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0], list(entry[1])
+
+    def put(self, query: str, device: str, results: list[SearchResult]) -> None:
+        """検索結果を保存する。上限を超えたら最も古く使われたエントリを追い出す."""
+        key = self._key(query, device)
+        self._entries[key] = (self._clock(), list(results))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        """キャッシュのヒット・ミス等のメトリクスを返す."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "expirations": self.expirations,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+        }
+
+    def load(self) -> None:
+        """永続化ファイルから有効期限内のエントリを読み込み、手元のエントリとマージする.
+
+        同じキーは保存時刻が新しい方を残す。ファイルやエントリの形式が不正な場合は
+        警告を出して読み飛ばす（キャッシュミス扱い）。
+        """
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning("検索結果キャッシュの読み込みに失敗: %s", e)
+            return
+        if not isinstance(data, dict):
+            logger.warning("検索結果キャッシュの形式が不正なため無視: %s", type(data).__name__)
+            return
+
+        loaded: list[tuple[float, str, list[SearchResult]]] = []
+        for key, entry in data.items():
+            try:
+                stored_at = float(entry["stored_at"])
+                results = [SearchResult(**r) for r in entry["results"]]
+            except (KeyError, TypeError, AttributeError, ValueError) as e:
+                logger.warning("不正なキャッシュエントリを無視: key=%s, error=%s", key, e)
+                continue
+            loaded.append((stored_at, key, results))
+
+        now = self._clock()
+        for stored_at, key, results in sorted(loaded, key=lambda t: t[0]):
+            if now - stored_at >= self.ttl:
+                continue
+            current = self._entries.get(key)
+            if current is not None and current[0] >= stored_at:
+                continue
+            self._entries[key] = (stored_at, results)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def save(self) -> None:
+        """ファイル上のエントリとマージしてから、有効期限内のエントリを書き出す.
+
+        一意な一時ファイルに書いてから置換するので、同時に保存するプロセス同士で
+        一時ファイルを取り合うことはない。ただし読み直しから置換までの間に別プロセスが
+        保存したエントリは失われうる（キャッシュミスになるだけ）。
+        """
+        if self.path is None:
+            return
+        # 他プロセスが先に保存したエントリを取り込む
+        self.load()
+        now = self._clock()
+        data = {
+            key: {"stored_at": stored_at, "results": [asdict(r) for r in results]}
+            for key, (stored_at, results) in self._entries.items()
+            if now - stored_at < self.ttl
+        }
+        tmp_path: Path | None = None
+        try:
+            with tempfile.NamedTemporaryFile(
+                "w",
+                encoding="utf-8",
+                dir=self.path.parent,
+                prefix=f"{self.path.stem}.",
+                suffix=".tmp",
+                delete=False,
+            ) as f:
+                tmp_path = Path(f.name)
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning("検索結果キャッシュの保存に失敗: %s", e)
+            if tmp_path is not None:
+                tmp_path.unlink(missing_ok=True)
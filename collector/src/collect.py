@@ -0,0 +1,241 @@
+"""オンデマンド収集モジュール.
+
+M-04 で登録した直後の商品・キーワードを、定期実行（main.run）を待たずに収集する。
+検索は検索結果キャッシュを経由するため、直近に同じクエリ×デバイスを検索していれば
+楽天へのリクエストを行わずに再利用する。定期実行も同じキャッシュを使う。
+
+キャッシュから再利用した結果は、実際に検索した日時（キャッシュの保存時刻）で記録する。
+オンデマンド収集の行は source = on_demand として記録し、変動分析の対象外とする。
+
+実行例:
+  uv run python -m src.collect --product-id <uuid>
+  uv run python -m src.collect --keyword-id <uuid>
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+from datetime import datetime, timezone
+
+from src.cache import SearchResultCache
+from src.config import DEVICES, SEARCH_CACHE_MAX_ENTRIES, SEARCH_CACHE_PATH, SEARCH_CACHE_TTL
+from src.db import get_active_product_keywords, insert_rankings, insert_shop_hit_counts
+from src.keywords import group_by_search_query, search_keyword
+from src.models import SOURCE_ON_DEMAND, SOURCE_SCHEDULED, SearchResult
+from src.scraper import (
+    fetch_search_page,
+    index_search_results,
+    parse_search_results,
+    wait_interval,
+)
+
+logger = logging.getLogger(__name__)
+
+# プロセス内で共有する検索結果キャッシュ（ファイル経由で別プロセスとも共有）
+search_cache = SearchResultCache(
+    SEARCH_CACHE_TTL, SEARCH_CACHE_MAX_ENTRIES, SEARCH_CACHE_PATH
+)
+
+
+def search(
+    query: str, device: str, searched_at: str, cache: SearchResultCache = search_cache
+) -> tuple[str, list[SearchResult]] | None:
+    """キャッシュ経由で検索結果を取得する.
+
+    キャッシュになければ検索ページを取得・パースしてキャッシュに保存する。
+    リクエスト間隔の待機は実際に楽天へアクセスした場合のみ行う。
+
+    Args:
+        searched_at: 新たに検索した場合に記録する検索日時（ISO 8601）
+
+    Returns:
+        (検索日時, 検索結果リスト)。キャッシュ利用時の検索日時はキャッシュの保存時刻。
+        取得失敗時は None。
+    """
+    entry = cache.lookup(query, device)
+    if entry is not None:
+        stored_at, results = entry
+        logger.info("キャッシュ利用: keyword=%s, device=%s", query, device)
+        return datetime.fromtimestamp(stored_at, timezone.utc).isoformat(), results
+
+    html = fetch_search_page(query, device)
+    wait_interval()
+    if html is None:
+        return None
+
+    results = parse_search_results(html)
+    # パース失敗（0 件）は一時的な可能性があるのでキャッシュしない
+    if results:
+        cache.put(query, device, results)
+    return searched_at, results
+
+
+def collect_query(
+    query: str,
+    products: list[dict],
+    searched_at: str,
+    source: str = SOURCE_SCHEDULED,
+    cache: SearchResultCache = search_cache,
+    record_failures: bool = True,
+) -> tuple[list[dict], list[dict], int]:
+    """1 つの検索クエリについて全デバイスの順位・店舗ヒット数レコードを作る.
+
+    Args:
+        query: 楽天へ送る検索キーワード（グループの代表表記）
+        products: このクエリに紐付く商品×キーワード（get_active_product_keywords の要素）
+        searched_at: 新たに検索した結果に記録する検索日時（ISO 8601）
+        source: rankings.source に記録する取得元
+        record_failures: True なら取得に失敗したデバイスの商品を圏外として記録する
+
+    Returns:
+        (rankings レコード, shop_hit_counts レコード, 取得失敗回数)
+    """
+    ranking_records: list[dict] = []
+    hit_count_records: list[dict] = []
+    error_count = 0
+
+    for device in DEVICES:
+        logger.info("検索中: keyword=%s, device=%s", query, device)
+        found = search(query, device, searched_at, cache)
+
+        if found is None:
+            error_count += 1
+            logger.warning("スキップ: keyword=%s, device=%s", query, device)
+            if not record_failures:
+                continue
+            # 圏外として記録
+            for p in products:
+                ranking_records.append({
+                    "product_id": p["product_id"],
+                    "keyword_id": p["keyword_id"],
+                    "device": device,
+                    "rank": None,
+                    "page": 1,
+                    "searched_at": searched_at,
+                    "source": source,
+                })
+            continue
+
+        result_searched_at, results = found
+        # 検索結果を索引化し、紐付く全キーワードで共有
+        rank_index, shop_hits = index_search_results(results)
+        logger.info("検索結果: %d 件の商品を取得", len(results))
+
+        # 各登録商品の順位を照合し、元の keyword_id ごとに記録
+        for p in products:
+            rank = rank_index.get((p["shop_url"], p["product_code"]))
+            ranking_records.append({
+                "product_id": p["product_id"],
+                "keyword_id": p["keyword_id"],
+                "device": device,
+                "rank": rank,
+                "page": 1,
+                "searched_at": result_searched_at,
+                "source": source,
+            })
+            status = f"{rank}位" if rank else "圏外"
+            logger.info(
+                "  %s/%s → %s",
+                p["shop_url"], p["product_code"], status,
+            )
+
+        # 店舗ヒット数を記録（keyword_id × shop_url をユニークにして集計）
+        pairs_seen: set[tuple[str, str]] = set()
+        for p in products:
+            pair = (p["keyword_id"], p["shop_url"])
+            if pair not in pairs_seen:
+                pairs_seen.add(pair)
+                hit_count_records.append({
+                    "keyword_id": p["keyword_id"],
+                    "shop_url": p["shop_url"],
+                    "device": device,
+                    "hit_count": shop_hits[p["shop_url"]],
+                    "searched_at": result_searched_at,
+                })
+
+    return ranking_records, hit_count_records, error_count
+
+
+def collect(
+    product_id: str | None = None,
+    keyword_id: str | None = None,
+    cache: SearchResultCache = search_cache,
+) -> tuple[list[dict], int]:
+    """指定した商品またはキーワードの順位を即時に収集して記録する.
+
+    取得に失敗した検索は圏外として記録せず、次回の定期実行に任せる。
+
+    Args:
+        product_id: 商品（uuid）。指定すると紐付く全キーワードを収集
+        keyword_id: キーワード（uuid）。指定すると紐付く全商品を収集
+
+    Returns:
+        (記録した rankings レコード, 検索ページの取得失敗回数)
+    """
+    if product_id is None and keyword_id is None:
+        raise ValueError("product_id か keyword_id のどちらかを指定してください")
+
+    product_keywords = get_active_product_keywords(product_id=product_id, keyword_id=keyword_id)
+    if not product_keywords:
+        logger.warning(
+            "対象の商品×キーワードがありません: product_id=%s, keyword_id=%s",
+            product_id, keyword_id,
+        )
+        return [], 0
+
+    cache.load()
+    searched_at = datetime.now(timezone.utc).isoformat()
+    ranking_records: list[dict] = []
+    hit_count_records: list[dict] = []
+    error_count = 0
+
+    for products in group_by_search_query(product_keywords).values():
+        rankings, hit_counts, errors = collect_query(
+            search_keyword(products), products, searched_at, SOURCE_ON_DEMAND, cache,
+            record_failures=False,
+        )
+        ranking_records.extend(rankings)
+        hit_count_records.extend(hit_counts)
+        error_count += errors
+
+    # 変動サマリはオンデマンドの行を使わないため、次回の定期実行で更新される
+    insert_rankings(ranking_records)
+    insert_shop_hit_counts(hit_count_records)
+    cache.save()
+
+    if error_count:
+        logger.warning(
+            "オンデマンド収集で検索ページの取得に %d 回失敗しました（該当分は未記録）: "
+            "product_id=%s, keyword_id=%s",
+            error_count, product_id, keyword_id,
+        )
+    logger.info("オンデマンド収集: rankings=%d 件, エラー: %d 回, 検索結果キャッシュ: %s",
+                len(ranking_records), error_count, cache.stats())
+    return ranking_records, error_count
+
+
+def main(argv: list[str] | None = None) -> None:
+    """コマンドラインから 1 商品または 1 キーワードを収集する.
+
+    検索ページの取得に失敗した場合は終了コード 1 で終了する。
+    """
+    parser = argparse.ArgumentParser(description="商品・キーワードの順位をその場で収集する")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--product-id", help="商品の uuid")
+    target.add_argument("--keyword-id", help="キーワードの uuid")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+        handlers=[logging.StreamHandler(sys.stdout)],
+    )
+    _, error_count = collect(product_id=args.product_id, keyword_id=args.keyword_id)
+    if error_count:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
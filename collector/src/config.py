@@ -37,6 +37,12 @@ USER_AGENTS = {
 REQUEST_INTERVAL_MIN = 1.0
 REQUEST_INTERVAL_MAX = 3.0
 REQUEST_TIMEOUT = 15  # 秒
+# ストリーミング取得: 検索結果ペイロードを受信し終えた時点で接続を閉じる
+STREAM_FETCH = True
+STREAM_CHUNK_SIZE = 16 * 1024  # バイト
+
+# --- 定期実行 ---
+COLLECTION_INTERVAL_HOURS = 2  # タスクスケジューラの実行間隔
 
 # --- デバイス ---
 DEVICES = ["pc", "sp"]
@@ -44,3 +50,19 @@ DEVICES = ["pc", "sp"]
 # --- ログ ---
 LOG_DIR = Path(__file__).resolve().parent.parent / "logs"
 LOG_DIR.mkdir(exist_ok=True)
+
+# --- 検索結果キャッシュ ---
+# オンデマンド収集と定期実行で直近の検索結果を共有する
+SEARCH_CACHE_TTL = 30 * 60  # 秒
+SEARCH_CACHE_MAX_ENTRIES = 500
+CACHE_DIR = Path(__file__).resolve().parent.parent / "cache"
+CACHE_DIR.mkdir(exist_ok=True)
+SEARCH_CACHE_PATH = CACHE_DIR / "search_results.json"
+
+# --- 順位変動分析 ---
+# 差分を計算する窓（収集回数単位。2 時間間隔なので 1=前回, 12=1日前, 84=1週間前）
+ANALYTICS_WINDOWS = (1, 12, 84)
+# 再計算時に読み込む履歴の期間（最大の窓 + 1 回分）。連続圏外回数もこの範囲で数える
+ANALYTICS_HISTORY_HOURS = (max(ANALYTICS_WINDOWS) + 1) * COLLECTION_INTERVAL_HOURS
+# 変動区分（上昇・下降・停滞）の判定に使う窓
+MOVEMENT_WINDOW = 1
@@ -23,9 +23,17 @@ def _table(name: str):
     return _client.schema("rank_tracker").table(name)
 
 
-def get_active_product_keywords() -> list[dict]:
+def get_active_product_keywords(
+    product_id: str | None = None, keyword_id: str | None = None
+) -> list[dict]:
     """全商品×キーワードの組み合わせを取得する.
 
+    product_keywords の登録順（created_at, id）に並べて返す。
+
+    Args:
+        product_id: 指定すると該当商品（uuid）の組み合わせだけに絞り込む
+        keyword_id: 指定すると該当キーワード（uuid）の組み合わせだけに絞り込む
+
     Returns:
         [
             {
@@ -40,15 +48,16 @@ def get_active_product_keywords() -> list[dict]:
             ...
         ]
     """
-    resp = (
-        _table("product_keywords")
-        .select(
-            "id, product_id, keyword_id, "
-            "products:product_id(shop_url, product_id, display_name), "
-            "keywords:keyword_id(keyword)"
-        )
-        .execute()
+    query = _table("product_keywords").select(
+        "id, product_id, keyword_id, "
+        "products:product_id(shop_url, product_id, display_name), "
+        "keywords:keyword_id(keyword)"
     )
+    if product_id is not None:
+        query = query.eq("product_id", product_id)
+    if keyword_id is not None:
+        query = query.eq("keyword_id", keyword_id)
+    resp = query.order("created_at").order("id").execute()
 
     results = []
     for row in resp.data:
@@ -71,7 +80,7 @@ def insert_rankings(records: list[dict]) -> None:
     """順位レコードを一括挿入する.
 
     Args:
-        records: [{"product_id", "keyword_id", "device", "rank", "page", "searched_at"}, ...]
+        records: [{"product_id", "keyword_id", "device", "rank", "page", "searched_at", "source"}, ...]
     """
     if not records:
         return
@@ -89,3 +98,55 @@ def insert_shop_hit_counts(records: list[dict]) -> None:
         return
     _table("shop_hit_counts").insert(records).execute()
     logger.info("shop_hit_counts に %d 件挿入", len(records))
+
+
+def get_ranking_history(since: str | None = None, page_size: int = 1000) -> list[dict]:
+    """順位履歴を取得する（変動分析用）.
+
+    Supabase は 1 リクエストあたりの取得件数に上限があるため、id のキーセットでページングする。
+
+    Args:
+        since: 指定するとこの日時（ISO 8601）以降の履歴だけに絞り込む
+
+    Returns:
+        [{"id", "product_id", "keyword_id", "device", "rank", "searched_at", "source"}, ...]
+    """
+    rows: list[dict] = []
+    last_id: str | None = None
+    while True:
+        query = _table("rankings").select(
+            "id, product_id, keyword_id, device, rank, searched_at, source"
+        )
+        if since is not None:
+            query = query.gte("searched_at", since)
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        resp = query.order("id").limit(page_size).execute()
+        rows.extend(resp.data)
+        if len(resp.data) < page_size:
+            break
+        last_id = resp.data[-1]["id"]
+    return rows
+
+
+def upsert_rank_summaries(records: list[dict]) -> None:
+    """順位変動サマリを (product_id, keyword_id, device) 単位で上書き保存する.
+
+    Args:
+        records: [{"product_id", "keyword_id", "device", "latest_rank", "latest_searched_at",
+                   "deltas", "out_of_rank_streak", "movement", "computed_at"}, ...]
+    """
+    if not records:
+        return
+    _table("rank_summaries").upsert(
+        records, on_conflict="product_id,keyword_id,device"
+    ).execute()
+    logger.info("rank_summaries に %d 件反映", len(records))
+
+
+def delete_stale_rank_summaries(computed_at: str) -> None:
+    """今回の再計算で更新されなかった（computed_at が古い）サマリを削除する.
+
+    紐付けを解除した商品×キーワードのサマリが最後の変動区分のまま残らないようにする。
+    """
+    _table("rank_summaries").delete().lt("computed_at", computed_at).execute()
@@ -0,0 +1,60 @@
+"""キーワード正規化モジュール.
+
+楽天検索で同一クエリとして扱われる表記揺れ（全角/半角・空白・大文字小文字）を
+1 つの正規形にまとめ、同じ検索を複数回実行しないようにする。
+
+正規形はグルーピング用のキーにだけ使い、楽天へ送るのは登録されたキーワードそのもの。
+NFKC は ①→1, ㈱→(株) のような互換文字も畳み込むため、それらの表記揺れも同じ検索とみなす。
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import unicodedata
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def normalize_keyword(keyword: str) -> str:
+    """検索キーワードを正規形に変換する.
+
+    NFKC 正規化（全角英数・全角スペース → 半角、半角カナ → 全角）、
+    連続する空白の 1 つへの圧縮、前後の空白除去、英字の小文字化を行う。
+    """
+    normalized = unicodedata.normalize("NFKC", keyword)
+    normalized = _WHITESPACE_PATTERN.sub(" ", normalized).strip()
+    return normalized.lower()
+
+
+def group_by_search_query(product_keywords: list[dict]) -> dict[str, list[dict]]:
+    """商品×キーワードの組み合わせを正規化済み検索クエリ単位にまとめる.
+
+    Args:
+        product_keywords: get_active_product_keywords() の戻り値
+
+    Returns:
+        {正規化済みクエリ: [product_keyword, ...]}。
+        各要素は元の keyword_id を保持しているので、検索結果を各キーワードに振り分けられる。
+        正規化すると空になるキーワード（空白のみ等）は警告を出して除外する。
+    """
+    groups: dict[str, list[dict]] = defaultdict(list)
+    for pk in product_keywords:
+        normalized = normalize_keyword(pk["keyword"])
+        if not normalized:
+            logger.warning("空のキーワードをスキップ: keyword_id=%s", pk["keyword_id"])
+            continue
+        groups[normalized].append(pk)
+    return dict(groups)
+
+
+def search_keyword(products: list[dict]) -> str:
+    """グループの検索に使うキーワードを返す.
+
+    グループ先頭の行、つまり get_active_product_keywords の並び順（紐付けの登録順）で
+    最初の組み合わせのキーワード表記を使う。
+    """
+    return products[0]["keyword"]
@@ -2,10 +2,11 @@
 
 処理フロー:
   1. DB から全商品×キーワード組み合わせを取得
-  2. キーワード単位でユニークにまとめる
-  3. 各キーワード × 各デバイスで検索実行
+  2. 表記揺れを正規化し、検索クエリ単位でユニークにまとめる
+  3. 各クエリ × 各デバイスで検索実行（直近の検索結果はキャッシュから再利用）
   4. 検索結果から全登録商品の順位を照合・記録
   5. 店舗ヒット数をカウント・記録
+  6. 順位履歴から変動サマリを再計算
 """
 
 from __future__ import annotations
@@ -13,18 +14,22 @@ from __future__ import annotations
 import logging
 import sys
 import time
-from collections import defaultdict
-from datetime import datetime, timezone
-
-from src.config import DEVICES, LOG_DIR
-from src.db import get_active_product_keywords, insert_rankings, insert_shop_hit_counts
-from src.scraper import (
-    count_shop_hits,
-    fetch_search_page,
-    find_product_rank,
-    parse_search_results,
-    wait_interval,
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+from src.analytics import compute_rank_summaries, summaries_to_records
+from src.collect import collect_query, search_cache
+from src.config import ANALYTICS_HISTORY_HOURS, DEVICES, LOG_DIR
+from src.db import (
+    delete_stale_rank_summaries,
+    get_active_product_keywords,
+    get_ranking_history,
+    insert_rankings,
+    insert_shop_hit_counts,
+    upsert_rank_summaries,
 )
+from src.keywords import group_by_search_query, search_keyword
 
 
 def setup_logging() -> None:
@@ -40,6 +45,32 @@ def setup_logging() -> None:
     )
 
 
+def refresh_rank_summaries(computed_at: str, active_pairs: set[tuple[str, str]]) -> int:
+    """順位履歴から変動サマリを再計算して保存する.
+
+    読み込むのは最大の窓に必要な直近 ANALYTICS_HISTORY_HOURS 時間分の履歴のみ。
+    現在紐付いている商品×キーワードだけを対象にし、今回更新されなかったサマリは削除する。
+
+    Args:
+        computed_at: 再計算日時（ISO 8601）
+        active_pairs: 現在紐付いている (product_id, keyword_id) の集合
+
+    Returns:
+        保存したサマリ件数
+    """
+    logger = logging.getLogger(__name__)
+    since = datetime.fromisoformat(computed_at) - timedelta(hours=ANALYTICS_HISTORY_HOURS)
+    history = pd.DataFrame(get_ranking_history(since.isoformat()))
+    if not history.empty:
+        pairs = pd.MultiIndex.from_frame(history[["product_id", "keyword_id"]])
+        history = history[pairs.isin(active_pairs)]
+    summaries = compute_rank_summaries(history)
+    upsert_rank_summaries(summaries_to_records(summaries, computed_at))
+    delete_stale_rank_summaries(computed_at)
+    logger.info("変動サマリ: 履歴 %d 行 → %d 件", len(history), len(summaries))
+    return len(summaries)
+
+
 def run() -> None:
     """メイン処理."""
     setup_logging()
@@ -55,97 +86,52 @@ def run() -> None:
 
     logger.info("取得した商品×キーワード組み合わせ: %d 件", len(product_keywords))
 
-    # 2. キーワード単位でグルーピング
-    # keyword_id -> {"keyword": str, "products": [{"product_id", "keyword_id", "shop_url", "product_code"}]}
-    keyword_groups: dict[str, dict] = defaultdict(lambda: {"keyword": "", "products": []})
-    for pk in product_keywords:
-        group = keyword_groups[pk["keyword_id"]]
-        group["keyword"] = pk["keyword"]
-        group["products"].append(pk)
+    # 2. 正規化済み検索クエリ単位でグルーピング（表記揺れのキーワードは 1 回の検索にまとめる）
+    # query -> [{"product_id", "keyword_id", "shop_url", "product_code", ...}]
+    query_groups = group_by_search_query(product_keywords)
+    keyword_count = len({pk["keyword_id"] for group in query_groups.values() for pk in group})
+    saved_requests = (keyword_count - len(query_groups)) * len(DEVICES)
 
-    logger.info("ユニークキーワード数: %d", len(keyword_groups))
+    logger.info("ユニークキーワード数: %d, 検索クエリ数: %d（重複排除で %d リクエスト削減）",
+                keyword_count, len(query_groups), saved_requests)
 
-    # 3. 各キーワード × 各デバイスで検索実行
+    # 3. 各クエリ × 各デバイスで検索実行（直近のオンデマンド収集の結果はキャッシュから再利用）
+    # 4〜6. 検索結果をパース・索引化し、各登録商品の順位と店舗ヒット数を keyword_id ごとに記録
+    search_cache.load()
     searched_at = datetime.now(timezone.utc).isoformat()
     ranking_records: list[dict] = []
     hit_count_records: list[dict] = []
     error_count = 0
-    search_count = 0
-
-    for keyword_id, group in keyword_groups.items():
-        keyword = group["keyword"]
-        products = group["products"]
-
-        for device in DEVICES:
-            logger.info("検索中: keyword=%s, device=%s", keyword, device)
-
-            html = fetch_search_page(keyword, device)
-            search_count += 1
-
-            if html is None:
-                error_count += 1
-                logger.warning("スキップ: keyword=%s, device=%s", keyword, device)
-                # 圏外として記録
-                for p in products:
-                    ranking_records.append({
-                        "product_id": p["product_id"],
-                        "keyword_id": keyword_id,
-                        "device": device,
-                        "rank": None,
-                        "page": 1,
-                        "searched_at": searched_at,
-                    })
-                wait_interval()
-                continue
-
-            # 4. 検索結果パース
-            results = parse_search_results(html)
-            logger.info("検索結果: %d 件の商品を取得", len(results))
-
-            # 5. 各登録商品の順位を照合
-            for p in products:
-                rank = find_product_rank(results, p["shop_url"], p["product_code"])
-                ranking_records.append({
-                    "product_id": p["product_id"],
-                    "keyword_id": keyword_id,
-                    "device": device,
-                    "rank": rank,
-                    "page": 1,
-                    "searched_at": searched_at,
-                })
-                status = f"{rank}位" if rank else "圏外"
-                logger.info(
-                    "  %s/%s → %s",
-                    p["shop_url"], p["product_code"], status,
-                )
-
-            # 6. 店舗ヒット数をカウント（登録商品の shop_url をユニークにして集計）
-            shop_urls_seen: set[str] = set()
-            for p in products:
-                if p["shop_url"] not in shop_urls_seen:
-                    shop_urls_seen.add(p["shop_url"])
-                    hit_count = count_shop_hits(results, p["shop_url"])
-                    hit_count_records.append({
-                        "keyword_id": keyword_id,
-                        "shop_url": p["shop_url"],
-                        "device": device,
-                        "hit_count": hit_count,
-                        "searched_at": searched_at,
-                    })
-
-            wait_interval()
-
-    # 7. DB に一括書き込み
+
+    for products in query_groups.values():
+        rankings, hit_counts, errors = collect_query(
+            search_keyword(products), products, searched_at, cache=search_cache
+        )
+        ranking_records.extend(rankings)
+        hit_count_records.extend(hit_counts)
+        error_count += errors
+
+    # 7. DB に一括書き込み（キャッシュの保存より先に行い、収集結果を失わないようにする）
     logger.info("DB 書き込み: rankings=%d 件, shop_hit_counts=%d 件",
                 len(ranking_records), len(hit_count_records))
     insert_rankings(ranking_records)
     insert_shop_hit_counts(hit_count_records)
 
+    search_cache.save()
+    cache_stats = search_cache.stats()
+
+    # 8. 順位変動サマリを再計算
+    refresh_rank_summaries(
+        searched_at, {(pk["product_id"], pk["keyword_id"]) for pk in product_keywords}
+    )
+
     # サマリ
     elapsed = time.time() - start_time
     logger.info("=== 検索順位取得 完了 ===")
-    logger.info("検索実行: %d 回, エラー: %d 回, 所要時間: %.1f 秒",
-                search_count, error_count, elapsed)
+    logger.info("検索実行: %d 回（重複排除で %d 回削減）, エラー: %d 回, 所要時間: %.1f 秒",
+                cache_stats["misses"], saved_requests, error_count, elapsed)
+    logger.info("検索結果キャッシュ: ヒット %d 回, ミス %d 回, ヒット率 %.1f%%",
+                cache_stats["hits"], cache_stats["misses"], cache_stats["hit_rate"] * 100)
 
 
 if __name__ == "__main__":
@@ -2,6 +2,10 @@
 
 from dataclasses import dataclass
 
+# rankings.source の値
+SOURCE_SCHEDULED = "scheduled"  # 定期実行（main.run）
+SOURCE_ON_DEMAND = "on_demand"  # オンデマンド収集（collect.collect）
+
 
 @dataclass
 class SearchResult:
@@ -23,6 +27,7 @@ class RankRecord:
     rank: int | None  # None = 圏外
     page: int
     searched_at: str  # ISO 8601
+    source: str  # "scheduled" or "on_demand"
 
 
 @dataclass
@@ -3,6 +3,10 @@
 取得戦略:
   1. window.__INITIAL_STATE__ の JSON パース（主戦略）
   2. JSON-LD (schema.org/ItemList) パース（フォールバック）
+
+ストリーミング取得時は __INITIAL_STATE__ の <script> を受信し終えた時点で
+残りの HTML をダウンロードせずに接続を閉じる。マーカーが現れない場合や、
+受信した __INITIAL_STATE__ から商品を取得できない場合は JSON-LD に備えて全体を読む。
 """
 
 from __future__ import annotations
@@ -12,6 +16,7 @@ import logging
 import random
 import re
 import time
+from collections import Counter
 from urllib.parse import quote
 
 import requests
@@ -22,6 +27,8 @@ from src.config import (
     REQUEST_INTERVAL_MIN,
     REQUEST_TIMEOUT,
     SEARCH_URL_TEMPLATE,
+    STREAM_CHUNK_SIZE,
+    STREAM_FETCH,
     USER_AGENTS,
 )
 from src.models import SearchResult
@@ -33,16 +40,27 @@ _ITEM_URL_PATTERN = re.compile(
     r"https?://item\.rakuten\.co\.jp/([^/]+)/([^/?]+)/?"
 )
 
+# 代入文だけを対象にする（if (window.__INITIAL_STATE__) のような参照では止めない）
+_INITIAL_STATE_MARKER = b"window.__INITIAL_STATE__"
+_INITIAL_STATE_ASSIGN = re.compile(rb"window\.__INITIAL_STATE__\s*=")
+# マーカー直後の空白がバッファ末尾まで続いている（= の受信待ち）
+_INITIAL_STATE_PENDING = re.compile(rb"window\.__INITIAL_STATE__\s*\Z")
+_SCRIPT_END = b"</script>"
+_INITIAL_STATE_PATTERN = re.compile(
+    r"window\.__INITIAL_STATE__\s*=\s*({.+?});\s*<\/script>", re.DOTALL
+)
+
 
-def fetch_search_page(keyword: str, device: str) -> str | None:
+def fetch_search_page(keyword: str, device: str, stream: bool = STREAM_FETCH) -> str | None:
     """楽天検索ページの HTML を取得する.
 
     Args:
         keyword: 検索キーワード
         device: "pc" or "sp"
+        stream: True なら __INITIAL_STATE__ を受信し終えた時点で打ち切る
 
     Returns:
-        HTML 文字列。失敗時は None。
+        HTML 文字列（ストリーミング時は打ち切り位置までの前半部分）。失敗時は None。
     """
     url = SEARCH_URL_TEMPLATE.format(keyword=quote(keyword, safe=""))
     headers = {
@@ -52,6 +70,8 @@ def fetch_search_page(keyword: str, device: str) -> str | None:
     }
 
     try:
+        if stream:
+            return _fetch_streaming(url, headers, keyword, device)
         resp = requests.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
         resp.raise_for_status()
         return resp.text
@@ -60,6 +80,100 @@ def fetch_search_page(keyword: str, device: str) -> str | None:
         return None
 
 
+def _fetch_streaming(url: str, headers: dict, keyword: str, device: str) -> str:
+    """レスポンスを逐次読み込み、__INITIAL_STATE__ の受信完了で接続を閉じる."""
+    extractor = _InitialStateExtractor()
+    truncated = False
+    with requests.get(url, headers=headers, timeout=REQUEST_TIMEOUT, stream=True) as resp:
+        resp.raise_for_status()
+        encoding = resp.encoding or "utf-8"
+        for chunk in resp.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+            if not extractor.feed(chunk):
+                continue
+            # 商品がある場合だけ打ち切る。なければ JSON-LD のために読み続ける
+            html = extractor.decode(encoding)
+            if _initial_state_has_items(html):
+                truncated = True
+                break
+            logger.warning(
+                "__INITIAL_STATE__ から商品を取得できないため全体を取得 keyword=%s, device=%s",
+                keyword, device,
+            )
+
+        # Content-Length は転送時（圧縮後）のサイズなので、受信済みの生バイト数と比較する
+        content_length = resp.headers.get("Content-Length")
+        received = resp.raw.tell()
+
+    if not truncated:
+        logger.info(
+            "ストリーミング取得: 全体を取得 keyword=%s, device=%s, bytes=%d",
+            keyword, device, received,
+        )
+    elif content_length and content_length.isdigit():
+        logger.info(
+            "ストリーミング取得: keyword=%s, device=%s, 受信=%d bytes, 削減=%d bytes",
+            keyword, device, received, max(int(content_length) - received, 0),
+        )
+    else:
+        logger.info(
+            "ストリーミング取得: keyword=%s, device=%s, 受信=%d bytes（総サイズ不明）",
+            keyword, device, received,
+        )
+
+    if not truncated:
+        html = extractor.decode(encoding)
+    return html
+
+
+class _InitialStateExtractor:
+    """逐次受信したバイト列から __INITIAL_STATE__ 代入文の <script> 終端を検出する.
+
+    チャンク境界をまたぐマーカーも検出できるよう、探索開始位置だけを進めて
+    バッファ全体の再走査を避ける。
+    """
+
+    def __init__(self) -> None:
+        self._buffer = bytearray()
+        self._scan_from = 0
+        self._marker_at = -1
+        self.complete = False
+
+    def decode(self, encoding: str) -> str:
+        """これまでに受信したバイト列を文字列に変換する."""
+        return self._buffer.decode(encoding, errors="replace")
+
+    def feed(self, chunk: bytes) -> bool:
+        """チャンクを追加し、このチャンクでペイロードの受信が完了したら True を返す.
+
+        完了後もチャンクは蓄積し続ける（False を返す）。
+        """
+        self._buffer += chunk
+        if self.complete:
+            return False
+
+        if self._marker_at < 0:
+            match = _INITIAL_STATE_ASSIGN.search(self._buffer, self._scan_from)
+            if match is None:
+                pending = _INITIAL_STATE_PENDING.search(self._buffer, self._scan_from)
+                if pending is not None:
+                    self._scan_from = pending.start()
+                else:
+                    self._scan_from = max(
+                        len(self._buffer) - len(_INITIAL_STATE_MARKER) + 1, self._scan_from
+                    )
+                return False
+            self._marker_at = match.start()
+            self._scan_from = match.end()
+
+        end = self._buffer.find(_SCRIPT_END, self._scan_from)
+        if end < 0:
+            self._scan_from = max(len(self._buffer) - len(_SCRIPT_END) + 1, self._scan_from)
+            return False
+
+        self.complete = True
+        return True
+
+
 def wait_interval() -> None:
     """リクエスト間隔を 1〜3 秒ランダムで待機する."""
     interval = random.uniform(REQUEST_INTERVAL_MIN, REQUEST_INTERVAL_MAX)
@@ -85,20 +199,29 @@ def parse_search_results(html: str) -> list[SearchResult]:
     return []
 
 
-def _parse_from_initial_state(html: str) -> list[SearchResult]:
-    """window.__INITIAL_STATE__ JSON から商品リストを抽出する."""
-    match = re.search(r"window\.__INITIAL_STATE__\s*=\s*({.+?});\s*<\/script>", html, re.DOTALL)
+def _initial_state_items(html: str) -> list | None:
+    """window.__INITIAL_STATE__ JSON の ichibaSearch.items を取り出す."""
+    match = _INITIAL_STATE_PATTERN.search(html)
     if not match:
-        return []
+        return None
 
     try:
         state = json.loads(match.group(1))
     except json.JSONDecodeError as e:
         logger.warning("__INITIAL_STATE__ JSON パースエラー: %s", e)
-        return []
+        return None
+
+    return _deep_get(state, "ichibaSearch", "items")
+
 
-    # items の取得パス: ichibaSearch.items
-    items = _deep_get(state, "ichibaSearch", "items")
+def _initial_state_has_items(html: str) -> bool:
+    """__INITIAL_STATE__ に商品が含まれるかを、SearchResult を作らずに判定する."""
+    return bool(_initial_state_items(html))
+
+
+def _parse_from_initial_state(html: str) -> list[SearchResult]:
+    """window.__INITIAL_STATE__ JSON から商品リストを抽出する."""
+    items = _initial_state_items(html)
     if not items:
         return []
 
@@ -195,3 +318,17 @@ def find_product_rank(
 def count_shop_hits(results: list[SearchResult], shop_url: str) -> int:
     """検索結果リストで指定 shop_url の商品が何件あるかカウントする."""
     return sum(1 for r in results if r.shop_url == shop_url)
+
+
+def index_search_results(
+    results: list[SearchResult],
+) -> tuple[dict[tuple[str, str], int], Counter[str]]:
+    """検索結果を (shop_url, product_id) → 順位 と shop_url → ヒット数 に索引化する.
+
+    1 回の検索結果を多数の登録商品で照合する場合に、find_product_rank /
+    count_shop_hits の線形走査を繰り返さずに済むようにする。
+    """
+    ranks: dict[tuple[str, str], int] = {}
+    for r in results:
+        ranks.setdefault((r.shop_url, r.product_id), r.position)
+    return ranks, Counter(r.shop_url for r in results)
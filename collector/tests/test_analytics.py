@@ -0,0 +1,134 @@
+"""analytics モジュールのユニットテスト."""
+
+import pandas as pd
+import pytest
+
+from src.analytics import compute_rank_summaries, summaries_to_records
+
+
+def _history(ranks: list[int | None], device: str = "pc", product_id: str = "p1") -> list[dict]:
+    """1 時間刻みの順位履歴を作る."""
+    return [
+        {
+            "product_id": product_id,
+            "keyword_id": "k1",
+            "device": device,
+            "rank": rank,
+            "searched_at": f"2026-02-27T{hour:02d}:00:00+00:00",
+        }
+        for hour, rank in enumerate(ranks)
+    ]
+
+
+def _summary(rows: list[dict], **kwargs) -> pd.DataFrame:
+    return compute_rank_summaries(pd.DataFrame(rows), **kwargs)
+
+
+class TestComputeRankSummaries:
+    """compute_rank_summaries のテスト."""
+
+    def test_latest_and_deltas(self):
+        summary = _summary(_history([10, 8, 5]), windows=(1, 2), movement_window=1)
+
+        assert len(summary) == 1
+        row = summary.iloc[0]
+        assert row["latest_rank"] == 5
+        assert row["delta_1"] == 3
+        assert row["delta_2"] == 5
+        assert row["movement"] == "up"
+        assert row["out_of_rank_streak"] == 0
+
+    def test_unsorted_input(self):
+        """入力の並び順に関係なく searched_at 順で判定すること."""
+        rows = _history([10, 8, 5])[::-1]
+        summary = _summary(rows, windows=(1,), movement_window=1)
+
+        assert summary.iloc[0]["latest_rank"] == 5
+        assert summary.iloc[0]["delta_1"] == 3
+
+    def test_down_and_flat(self):
+        rows = _history([3, 7], device="pc") + _history([4, 4], device="sp")
+        summary = _summary(rows, windows=(1,), movement_window=1).set_index("device")
+
+        assert summary.loc["pc", "movement"] == "down"
+        assert summary.loc["pc", "delta_1"] == -4
+        assert summary.loc["sp", "movement"] == "flat"
+
+    def test_out_of_rank_streak(self):
+        summary = _summary(_history([5, None, None, None]), windows=(1, 3), movement_window=1)
+        row = summary.iloc[0]
+
+        assert pd.isna(row["latest_rank"])
+        assert pd.isna(row["delta_1"])
+        assert pd.isna(row["delta_3"])
+        assert row["out_of_rank_streak"] == 3
+        assert row["movement"] == "flat"
+
+    def test_never_ranked(self):
+        summary = _summary(_history([None, None]), windows=(1,), movement_window=1)
+
+        assert summary.iloc[0]["out_of_rank_streak"] == 2
+
+    def test_out_of_rank_transitions(self):
+        """圏外は最下位として変動区分を判定すること."""
+        rows = _history([None, 20], product_id="p1") + _history([20, None], product_id="p2")
+        summary = _summary(rows, windows=(1,), movement_window=1).set_index("product_id")
+
+        assert summary.loc["p1", "movement"] == "up"
+        assert summary.loc["p2", "movement"] == "down"
+        assert pd.isna(summary.loc["p1", "delta_1"])
+
+    def test_insufficient_history(self):
+        summary = _summary(_history([7]), windows=(1, 12), movement_window=1)
+        row = summary.iloc[0]
+
+        assert row["latest_rank"] == 7
+        assert pd.isna(row["delta_12"])
+        assert row["movement"] == "flat"
+
+    def test_ignores_on_demand_rows(self):
+        """オンデマンド収集の行は収集回数の窓に数えないこと."""
+        rows = [
+            {"rank": 20, "searched_at": "2026-02-27T08:00:00+00:00", "source": "scheduled"},
+            {"rank": 5, "searched_at": "2026-02-27T09:50:00+00:00", "source": "on_demand"},
+            # 定期実行がオンデマンドの検索結果をキャッシュから再利用した行
+            {"rank": 5, "searched_at": "2026-02-27T09:50:00+00:00", "source": "scheduled"},
+        ]
+        for row in rows:
+            row.update(product_id="p1", keyword_id="k1", device="pc")
+        summary = _summary(rows, windows=(1,), movement_window=1)
+        row = summary.iloc[0]
+
+        assert row["latest_rank"] == 5
+        assert row["delta_1"] == 15
+        assert row["movement"] == "up"
+
+    def test_empty_history(self):
+        summary = compute_rank_summaries(pd.DataFrame(), windows=(1,), movement_window=1)
+
+        assert summary.empty
+        assert "delta_1" in summary.columns
+
+    def test_invalid_movement_window(self):
+        with pytest.raises(ValueError):
+            _summary(_history([1]), windows=(1,), movement_window=12)
+
+
+class TestSummariesToRecords:
+    """summaries_to_records のテスト."""
+
+    def test_records(self):
+        summary = _summary(_history([10, None]), windows=(1, 12), movement_window=1)
+        records = summaries_to_records(summary, "2026-02-27T02:00:00+00:00")
+
+        assert records == [{
+            "product_id": "p1",
+            "keyword_id": "k1",
+            "device": "pc",
+            "latest_rank": None,
+            "latest_searched_at": "2026-02-27T01:00:00+00:00",
+            "deltas": {"1": None, "12": None},
+            "out_of_rank_streak": 1,
+            "movement": "down",
+            "computed_at": "2026-02-27T02:00:00+00:00",
+        }]
@@ -0,0 +1,139 @@
+"""cache モジュールのユニットテスト."""
+
+import json
+from dataclasses import asdict
+
+from src.cache import SearchResultCache
+from src.models import SearchResult
+
+
+class _Clock:
+    """テスト用の手動で進める時計."""
+
+    def __init__(self) -> None:
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _results(shop_url: str = "aikanhonpo") -> list[SearchResult]:
+    return [SearchResult(position=1, shop_url=shop_url, product_id="1355740", name="ノニジュース")]
+
+
+class TestSearchResultCache:
+    """SearchResultCache のテスト."""
+
+    def test_hit_and_miss(self):
+        cache = SearchResultCache(ttl=60, max_entries=10, clock=_Clock())
+
+        assert cache.get("ノニジュース", "pc") is None
+        cache.put("ノニジュース", "pc", _results())
+
+        assert cache.get("ノニジュース", "pc") == _results()
+        assert cache.get("ノニジュース", "sp") is None
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 2
+        assert stats["size"] == 1
+
+    def test_normalized_key(self):
+        """表記揺れのあるクエリも同じエントリを参照すること."""
+        cache = SearchResultCache(ttl=60, max_entries=10, clock=_Clock())
+        cache.put("ノニ ジュース", "pc", _results())
+
+        assert cache.get("ﾉﾆ　ｼﾞｭｰｽ", "pc") == _results()
+
+    def test_expired(self):
+        clock = _Clock()
+        cache = SearchResultCache(ttl=60, max_entries=10, clock=clock)
+        cache.put("ノニジュース", "pc", _results())
+
+        clock.now += 60
+        assert cache.get("ノニジュース", "pc") is None
+        assert cache.stats()["expirations"] == 1
+        assert cache.stats()["size"] == 0
+
+    def test_evicts_least_recently_used(self):
+        cache = SearchResultCache(ttl=60, max_entries=2, clock=_Clock())
+        cache.put("a", "pc", _results("a"))
+        cache.put("b", "pc", _results("b"))
+        cache.get("a", "pc")
+        cache.put("c", "pc", _results("c"))
+
+        assert cache.get("b", "pc") is None
+        assert cache.get("a", "pc") == _results("a")
+        assert cache.get("c", "pc") == _results("c")
+        assert cache.stats()["evictions"] == 1
+
+    def test_save_and_load(self, tmp_path):
+        """保存したエントリを別インスタンス（別プロセス想定）で再利用できること."""
+        clock = _Clock()
+        path = tmp_path / "search_results.json"
+        writer = SearchResultCache(ttl=60, max_entries=10, path=path, clock=clock)
+        writer.put("ノニジュース", "pc", _results())
+        writer.save()
+
+        reader = SearchResultCache(ttl=60, max_entries=10, path=path, clock=clock)
+        reader.load()
+        assert reader.get("ノニジュース", "pc") == _results()
+
+        clock.now += 60
+        expired = SearchResultCache(ttl=60, max_entries=10, path=path, clock=clock)
+        expired.load()
+        assert expired.stats()["size"] == 0
+
+    def test_save_merges_other_process(self, tmp_path):
+        """別プロセスが先に保存したエントリを上書きで消さないこと."""
+        clock = _Clock()
+        path = tmp_path / "search_results.json"
+        scheduled = SearchResultCache(ttl=60, max_entries=10, path=path, clock=clock)
+        on_demand = SearchResultCache(ttl=60, max_entries=10, path=path, clock=clock)
+        scheduled.load()
+        on_demand.load()
+
+        on_demand.put("a", "pc", _results("a"))
+        on_demand.save()
+        clock.now += 1
+        scheduled.put("b", "pc", _results("b"))
+        scheduled.save()
+
+        reader = SearchResultCache(ttl=60, max_entries=10, path=path, clock=clock)
+        reader.load()
+        assert reader.get("a", "pc") == _results("a")
+        assert reader.get("b", "pc") == _results("b")
+        assert list(tmp_path.iterdir()) == [path]
+
+    def test_load_broken_file(self, tmp_path):
+        path = tmp_path / "search_results.json"
+        path.write_text("{broken", encoding="utf-8")
+        cache = SearchResultCache(ttl=60, max_entries=10, path=path)
+
+        cache.load()
+        assert cache.stats()["size"] == 0
+
+    def test_load_wrong_shape(self, tmp_path):
+        """JSON として正しくても形式が違うファイル・エントリは無視すること."""
+        clock = _Clock()
+        path = tmp_path / "search_results.json"
+        path.write_text("[]", encoding="utf-8")
+        cache = SearchResultCache(ttl=60, max_entries=10, path=path, clock=clock)
+
+        cache.load()
+        assert cache.stats()["size"] == 0
+
+        path.write_text(json.dumps({
+            "pc:a": {"stored_at": clock.now, "results": [{"position": 1, "shop_url": "a"}]},
+            "pc:b": {"results": []},
+            "pc:c": "broken",
+            "pc:d": {
+                "stored_at": clock.now,
+                "results": [asdict(r) for r in _results("d")],
+            },
+        }), encoding="utf-8")
+        cache.load()
+        assert cache.stats()["size"] == 1
+        assert cache.get("d", "pc") == _results("d")
+
+        # 保存時の読み直しでも例外にならないこと
+        cache.save()
@@ -0,0 +1,159 @@
+"""collect モジュールのモックテスト."""
+
+from datetime import datetime, timezone
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from src.cache import SearchResultCache
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+PRODUCT_KEYWORDS = [
+    {
+        "product_keyword_id": "pk-1",
+        "product_id": "uuid-p1",
+        "keyword_id": "uuid-k1",
+        "shop_url": "ichiban-okinawa",
+        "product_code": "noni-jyuce3",
+        "keyword": "ノニジュース",
+        "display_name": None,
+    },
+]
+
+
+def _html() -> str:
+    return (FIXTURES_DIR / "search_initial_state.html").read_text(encoding="utf-8")
+
+
+# キャッシュの保存時刻（= オンデマンドで検索した日時）
+STORED_AT = datetime(2026, 2, 27, 9, 50, tzinfo=timezone.utc)
+# その後の定期実行の開始日時
+SCHEDULED_AT = "2026-02-27T10:00:00+00:00"
+
+
+@pytest.fixture
+def cache():
+    return SearchResultCache(ttl=60 * 60, max_entries=10, clock=STORED_AT.timestamp)
+
+
+class TestSearch:
+    """search のテスト."""
+
+    @patch("src.collect.wait_interval")
+    @patch("src.collect.fetch_search_page")
+    def test_second_call_uses_cache(self, mock_fetch, mock_wait, cache):
+        from src.collect import search
+
+        mock_fetch.return_value = _html()
+
+        first_at, first = search("ノニジュース", "pc", STORED_AT.isoformat(), cache)
+        second_at, second = search("ノニジュース", "pc", SCHEDULED_AT, cache)
+
+        assert first == second
+        assert len(first) == 5
+        # キャッシュ利用時は実際に検索した日時を返す
+        assert first_at == second_at == STORED_AT.isoformat()
+        mock_fetch.assert_called_once_with("ノニジュース", "pc")
+        mock_wait.assert_called_once()
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    @patch("src.collect.wait_interval")
+    @patch("src.collect.fetch_search_page", return_value=None)
+    def test_failure_not_cached(self, mock_fetch, mock_wait, cache):
+        from src.collect import search
+
+        assert search("ノニジュース", "pc", SCHEDULED_AT, cache) is None
+        assert search("ノニジュース", "pc", SCHEDULED_AT, cache) is None
+        assert mock_fetch.call_count == 2
+
+
+class TestCollectQuery:
+    """collect_query のテスト."""
+
+    @patch("src.collect.wait_interval")
+    @patch("src.collect.fetch_search_page")
+    def test_cached_results_keep_search_time(self, mock_fetch, mock_wait, cache):
+        """オンデマンドの結果を定期実行で再利用したら、元の検索日時で記録すること."""
+        from src.collect import collect_query
+
+        mock_fetch.return_value = _html()
+        collect_query("ノニジュース", PRODUCT_KEYWORDS, STORED_AT.isoformat(), "on_demand", cache)
+
+        rankings, hit_counts, errors = collect_query(
+            "ノニジュース", PRODUCT_KEYWORDS, SCHEDULED_AT, cache=cache
+        )
+
+        assert errors == 0
+        assert mock_fetch.call_count == 2
+        assert {r["searched_at"] for r in rankings} == {STORED_AT.isoformat()}
+        assert {r["source"] for r in rankings} == {"scheduled"}
+        assert {h["searched_at"] for h in hit_counts} == {STORED_AT.isoformat()}
+
+
+class TestCollect:
+    """collect のテスト."""
+
+    @patch("src.collect.insert_shop_hit_counts")
+    @patch("src.collect.insert_rankings")
+    @patch("src.collect.wait_interval")
+    @patch("src.collect.fetch_search_page")
+    @patch("src.collect.get_active_product_keywords", return_value=PRODUCT_KEYWORDS)
+    def test_collect_keyword(
+        self, mock_get, mock_fetch, mock_wait, mock_rankings, mock_hits, cache
+    ):
+        from src.collect import collect
+
+        mock_fetch.return_value = _html()
+
+        records, errors = collect(keyword_id="uuid-k1", cache=cache)
+
+        assert errors == 0
+        mock_get.assert_called_once_with(product_id=None, keyword_id="uuid-k1")
+        assert [(r["device"], r["rank"], r["source"]) for r in records] == [
+            ("pc", 3, "on_demand"),
+            ("sp", 3, "on_demand"),
+        ]
+        mock_rankings.assert_called_once_with(records)
+        assert [r["hit_count"] for r in mock_hits.call_args.args[0]] == [1, 1]
+
+        # 直後の再収集は楽天にアクセスしない
+        collect(keyword_id="uuid-k1", cache=cache)
+        assert mock_fetch.call_count == 2
+        assert cache.stats()["hits"] == 2
+
+    @patch("src.collect.insert_shop_hit_counts")
+    @patch("src.collect.insert_rankings")
+    @patch("src.collect.wait_interval")
+    @patch("src.collect.fetch_search_page", return_value=None)
+    @patch("src.collect.get_active_product_keywords", return_value=PRODUCT_KEYWORDS)
+    def test_fetch_failure_not_recorded(
+        self, mock_get, mock_fetch, mock_wait, mock_rankings, mock_hits, cache, caplog
+    ):
+        """取得失敗は圏外として記録せず、失敗回数を返すこと."""
+        from src.collect import collect
+
+        records, errors = collect(keyword_id="uuid-k1", cache=cache)
+
+        assert records == []
+        assert errors == 2
+        mock_rankings.assert_called_once_with([])
+        assert "2 回失敗" in caplog.text
+
+    @patch("src.collect.collect", return_value=([], 1))
+    def test_main_exits_nonzero_on_errors(self, mock_collect):
+        from src.collect import main
+
+        with pytest.raises(SystemExit) as exc:
+            main(["--keyword-id", "uuid-k1"])
+
+        assert exc.value.code == 1
+        mock_collect.assert_called_once_with(product_id=None, keyword_id="uuid-k1")
+
+    def test_requires_target(self, cache):
+        from src.collect import collect
+
+        with pytest.raises(ValueError):
+            collect(cache=cache)
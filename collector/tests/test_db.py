@@ -63,3 +63,72 @@ class TestInsertShopHitCounts:
 
         mock_table.assert_called_once_with("shop_hit_counts")
         mock_chain.insert.assert_called_once_with(records)
+
+
+class TestGetActiveProductKeywords:
+    """get_active_product_keywords のテスト."""
+
+    @patch("src.db._table")
+    def test_ordered_by_registration(self, mock_table):
+        """グループの代表表記が安定するよう登録順に並べて取得すること."""
+        from src.db import get_active_product_keywords
+
+        mock_chain = MagicMock()
+        mock_table.return_value = mock_chain
+        for method in ("select", "eq", "order"):
+            getattr(mock_chain, method).return_value = mock_chain
+        mock_chain.execute.return_value = MagicMock(data=[{
+            "id": "pk1",
+            "product_id": "p1",
+            "keyword_id": "k1",
+            "products": {"shop_url": "shop", "product_id": "code", "display_name": None},
+            "keywords": {"keyword": "ノニ"},
+        }])
+
+        rows = get_active_product_keywords(keyword_id="k1")
+
+        assert [r["product_keyword_id"] for r in rows] == ["pk1"]
+        mock_chain.eq.assert_called_once_with("keyword_id", "k1")
+        assert [c.args for c in mock_chain.order.call_args_list] == [("created_at",), ("id",)]
+
+
+class TestGetRankingHistory:
+    """get_ranking_history のテスト."""
+
+    @patch("src.db._table")
+    def test_keyset_paging_with_lower_bound(self, mock_table):
+        from src.db import get_ranking_history
+
+        mock_chain = MagicMock()
+        mock_table.return_value = mock_chain
+        for method in ("select", "gte", "gt", "order", "limit"):
+            getattr(mock_chain, method).return_value = mock_chain
+        mock_chain.execute.side_effect = [
+            MagicMock(data=[{"id": "a"}, {"id": "b"}]),
+            MagicMock(data=[{"id": "c"}]),
+        ]
+
+        rows = get_ranking_history("2026-02-20T00:00:00+00:00", page_size=2)
+
+        assert [r["id"] for r in rows] == ["a", "b", "c"]
+        mock_chain.gte.assert_called_with("searched_at", "2026-02-20T00:00:00+00:00")
+        mock_chain.gt.assert_called_once_with("id", "b")
+        mock_chain.limit.assert_called_with(2)
+
+
+class TestDeleteStaleRankSummaries:
+    """delete_stale_rank_summaries のテスト."""
+
+    @patch("src.db._table")
+    def test_delete_older_than_computed_at(self, mock_table):
+        from src.db import delete_stale_rank_summaries
+
+        mock_chain = MagicMock()
+        mock_table.return_value = mock_chain
+        mock_chain.delete.return_value = mock_chain
+        mock_chain.lt.return_value = mock_chain
+
+        delete_stale_rank_summaries("2026-02-27T10:00:00+00:00")
+
+        mock_table.assert_called_once_with("rank_summaries")
+        mock_chain.lt.assert_called_once_with("computed_at", "2026-02-27T10:00:00+00:00")
@@ -0,0 +1,64 @@
+"""keywords モジュールのユニットテスト."""
+
+from src.keywords import group_by_search_query, normalize_keyword, search_keyword
+
+
+class TestNormalizeKeyword:
+    """normalize_keyword のテスト."""
+
+    def test_full_width_alphanumeric(self):
+        assert normalize_keyword("ＮＯＮＩ　９００ｍｌ") == "noni 900ml"
+
+    def test_half_width_katakana(self):
+        assert normalize_keyword("ﾉﾆｼﾞｭｰｽ") == "ノニジュース"
+
+    def test_whitespace_collapsed(self):
+        assert normalize_keyword("  ノニ 　 ジュース\t") == "ノニ ジュース"
+
+    def test_compatibility_characters(self):
+        """NFKC で互換文字が畳み込まれること（同じ検索とみなす表記揺れ）."""
+        assert normalize_keyword("ノニ①") == "ノニ1"
+        assert normalize_keyword("㈱ノニ") == "(株)ノニ"
+
+    def test_case_insensitive(self):
+        assert normalize_keyword("Noni Juice") == normalize_keyword("NONI juice")
+
+
+class TestGroupBySearchQuery:
+    """group_by_search_query のテスト."""
+
+    def test_variants_share_query(self):
+        product_keywords = [
+            {"product_id": "p1", "keyword_id": "k1", "keyword": "ノニ ジュース"},
+            {"product_id": "p2", "keyword_id": "k2", "keyword": "ノニ　ジュース"},
+            {"product_id": "p1", "keyword_id": "k3", "keyword": "ﾉﾆ ｼﾞｭｰｽ"},
+            {"product_id": "p1", "keyword_id": "k4", "keyword": "ノニ"},
+        ]
+        groups = group_by_search_query(product_keywords)
+
+        assert list(groups) == ["ノニ ジュース", "ノニ"]
+        assert [pk["keyword_id"] for pk in groups["ノニ ジュース"]] == ["k1", "k2", "k3"]
+        assert [pk["keyword_id"] for pk in groups["ノニ"]] == ["k4"]
+
+    def test_sends_first_row_keyword(self):
+        """楽天へ送るのは正規形ではなくグループ先頭の行の表記であること."""
+        product_keywords = [
+            {"product_id": "p1", "keyword_id": "k1", "keyword": "NONI ジュース"},
+            {"product_id": "p2", "keyword_id": "k2", "keyword": "noni　ジュース"},
+        ]
+        groups = group_by_search_query(product_keywords)
+
+        assert [search_keyword(g) for g in groups.values()] == ["NONI ジュース"]
+
+    def test_skips_empty_keyword(self, caplog):
+        product_keywords = [
+            {"product_id": "p1", "keyword_id": "k1", "keyword": " 　\t"},
+            {"product_id": "p1", "keyword_id": "k2", "keyword": "ノニ"},
+        ]
+        groups = group_by_search_query(product_keywords)
+
+        assert list(groups) == ["ノニ"]
+        assert "k1" in caplog.text
+
+    def test_empty(self):
+        assert group_by_search_query([]) == {}
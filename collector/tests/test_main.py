@@ -0,0 +1,114 @@
+"""main モジュールのモックテスト."""
+
+from pathlib import Path
+from unittest.mock import patch
+
+from src.cache import SearchResultCache
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+
+def _product_keyword(keyword_id: str, keyword: str, shop_url: str, product_code: str) -> dict:
+    return {
+        "product_keyword_id": f"pk-{keyword_id}",
+        "product_id": f"uuid-{product_code}",
+        "keyword_id": keyword_id,
+        "shop_url": shop_url,
+        "product_code": product_code,
+        "keyword": keyword,
+        "display_name": None,
+    }
+
+
+# 全角スペース・全角英字の表記揺れで、同じ検索クエリに正規化される 2 キーワード
+PRODUCT_KEYWORDS = [
+    _product_keyword("uuid-k1", "ノニ ジュース", "ichiban-okinawa", "noni-jyuce3"),
+    _product_keyword("uuid-k2", "ノニ　ジュース", "ichiban-okinawa", "noni-jyuce3"),
+    _product_keyword("uuid-k2", "ノニ　ジュース", "aikanhonpo", "1355740"),
+]
+
+
+class TestRun:
+    """run の表記揺れキーワードの重複排除テスト."""
+
+    @patch("src.main.refresh_rank_summaries")
+    @patch("src.main.insert_shop_hit_counts")
+    @patch("src.main.insert_rankings")
+    @patch("src.main.setup_logging")
+    @patch("src.collect.wait_interval")
+    @patch("src.collect.fetch_search_page")
+    @patch("src.main.get_active_product_keywords", return_value=PRODUCT_KEYWORDS)
+    def test_variant_keywords_share_one_search(
+        self, mock_get, mock_fetch, mock_wait, mock_logging,
+        mock_rankings, mock_hits, mock_refresh,
+    ):
+        from src.main import run
+
+        mock_fetch.return_value = (FIXTURES_DIR / "search_initial_state.html").read_text(
+            encoding="utf-8"
+        )
+
+        with patch("src.main.search_cache", SearchResultCache(ttl=60, max_entries=10)):
+            run()
+
+        # 2 キーワードでもデバイスごとに 1 回だけ取得する
+        assert [c.args for c in mock_fetch.call_args_list] == [
+            ("ノニ ジュース", "pc"),
+            ("ノニ ジュース", "sp"),
+        ]
+
+        rankings = mock_rankings.call_args.args[0]
+        assert {r["source"] for r in rankings} == {"scheduled"}
+        assert sorted(
+            (r["keyword_id"], r["product_id"], r["device"], r["rank"]) for r in rankings
+        ) == [
+            ("uuid-k1", "uuid-noni-jyuce3", "pc", 3),
+            ("uuid-k1", "uuid-noni-jyuce3", "sp", 3),
+            ("uuid-k2", "uuid-1355740", "pc", 1),
+            ("uuid-k2", "uuid-1355740", "sp", 1),
+            ("uuid-k2", "uuid-noni-jyuce3", "pc", 3),
+            ("uuid-k2", "uuid-noni-jyuce3", "sp", 3),
+        ]
+
+        hit_counts = mock_hits.call_args.args[0]
+        assert sorted(
+            (h["keyword_id"], h["shop_url"], h["device"], h["hit_count"]) for h in hit_counts
+        ) == [
+            ("uuid-k1", "ichiban-okinawa", "pc", 1),
+            ("uuid-k1", "ichiban-okinawa", "sp", 1),
+            ("uuid-k2", "aikanhonpo", "pc", 1),
+            ("uuid-k2", "aikanhonpo", "sp", 1),
+            ("uuid-k2", "ichiban-okinawa", "pc", 1),
+            ("uuid-k2", "ichiban-okinawa", "sp", 1),
+        ]
+
+
+class TestRefreshRankSummaries:
+    """refresh_rank_summaries のテスト."""
+
+    @patch("src.main.delete_stale_rank_summaries")
+    @patch("src.main.upsert_rank_summaries")
+    @patch("src.main.get_ranking_history")
+    def test_only_active_pairs(self, mock_history, mock_upsert, mock_delete):
+        """紐付けを解除した商品×キーワードは再計算せず、古いサマリを削除すること."""
+        from src.main import refresh_rank_summaries
+
+        mock_history.return_value = [
+            {
+                "product_id": product_id,
+                "keyword_id": "uuid-k1",
+                "device": "pc",
+                "rank": 3,
+                "searched_at": "2026-02-27T08:00:00+00:00",
+                "source": "scheduled",
+            }
+            for product_id in ("uuid-active", "uuid-unlinked")
+        ]
+        computed_at = "2026-02-27T10:00:00+00:00"
+
+        count = refresh_rank_summaries(computed_at, {("uuid-active", "uuid-k1")})
+
+        assert count == 1
+        assert [r["product_id"] for r in mock_upsert.call_args.args[0]] == ["uuid-active"]
+        mock_history.assert_called_once_with("2026-02-20T08:00:00+00:00")
+        mock_delete.assert_called_once_with(computed_at)
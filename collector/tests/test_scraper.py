@@ -1,11 +1,15 @@
 """scraper モジュールのユニットテスト."""
 
 from pathlib import Path
+from unittest.mock import MagicMock, patch
 
 from src.scraper import (
     _extract_from_url,
+    _InitialStateExtractor,
     count_shop_hits,
+    fetch_search_page,
     find_product_rank,
+    index_search_results,
     parse_search_results,
 )
 
@@ -137,3 +141,143 @@ class TestCountShopHits:
 
         count = count_shop_hits(results, "nonexistent-shop")
         assert count == 0
+
+
+class TestIndexSearchResults:
+    """index_search_results のテスト."""
+
+    def test_matches_linear_lookups(self):
+        """find_product_rank / count_shop_hits と同じ結果を返すこと."""
+        html = _load_fixture("search_initial_state.html")
+        results = parse_search_results(html)
+        ranks, shop_hits = index_search_results(results)
+
+        for r in results:
+            assert ranks[(r.shop_url, r.product_id)] == find_product_rank(
+                results, r.shop_url, r.product_id
+            )
+            assert shop_hits[r.shop_url] == count_shop_hits(results, r.shop_url)
+        assert ranks.get(("nonexistent-shop", "no-product")) is None
+        assert shop_hits["nonexistent-shop"] == 0
+
+
+def _chunks(data: bytes, size: int) -> list[bytes]:
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def _streaming_response(body: bytes, chunk_size: int = 64) -> MagicMock:
+    """requests.get(stream=True) のレスポンスを模したモックを作る."""
+    chunks = _chunks(body, chunk_size)
+    consumed = {"bytes": 0}
+
+    def iter_content(chunk_size=None):
+        for chunk in chunks:
+            consumed["bytes"] += len(chunk)
+            yield chunk
+
+    resp = MagicMock()
+    resp.__enter__.return_value = resp
+    resp.iter_content.side_effect = iter_content
+    resp.headers = {"Content-Length": str(len(body))}
+    resp.encoding = "utf-8"
+    resp.raw.tell.side_effect = lambda: consumed["bytes"]
+    return resp
+
+
+class TestInitialStateExtractor:
+    """_InitialStateExtractor のテスト."""
+
+    def test_complete_across_chunk_boundaries(self):
+        """マーカー・終端タグがチャンク境界をまたいでも検出できること."""
+        html = _load_fixture("search_initial_state.html").encode("utf-8")
+        extractor = _InitialStateExtractor()
+
+        for chunk in _chunks(html, 7):
+            if extractor.feed(chunk):
+                break
+
+        assert extractor.complete
+        assert "</html>" not in extractor.decode("utf-8")
+        assert len(parse_search_results(extractor.decode("utf-8"))) == 5
+
+    def test_ignores_reference_before_assignment(self):
+        """代入でない参照の後の </script> では止まらないこと."""
+        html = (
+            "<script>if (window.__INITIAL_STATE__) { init(); }</script>"
+            + _load_fixture("search_initial_state.html")
+        ).encode("utf-8")
+        extractor = _InitialStateExtractor()
+
+        for chunk in _chunks(html, 5):
+            if extractor.feed(chunk):
+                break
+
+        assert extractor.complete
+        assert len(parse_search_results(extractor.decode("utf-8"))) == 5
+
+    def test_marker_absent(self):
+        html = _load_fixture("search_json_ld.html").encode("utf-8")
+        extractor = _InitialStateExtractor()
+
+        for chunk in _chunks(html, 7):
+            assert not extractor.feed(chunk)
+
+        assert not extractor.complete
+        assert extractor.decode("utf-8") == html.decode("utf-8")
+
+
+class TestFetchSearchPageStreaming:
+    """fetch_search_page(stream=True) のテスト."""
+
+    @patch("src.scraper.requests.get")
+    def test_stops_after_initial_state(self, mock_get):
+        """__INITIAL_STATE__ 受信後は残りを読まずに打ち切ること."""
+        page = _load_fixture("search_initial_state.html") + "<div>padding</div>" * 500
+        resp = _streaming_response(page.encode("utf-8"))
+        mock_get.return_value = resp
+
+        html = fetch_search_page("ノニジュース", "pc", stream=True)
+
+        assert mock_get.call_args.kwargs["stream"] is True
+        assert resp.raw.tell() < len(page.encode("utf-8"))
+        assert html.count("padding") < 500
+        assert len(parse_search_results(html)) == 5
+
+    @patch("src.scraper._parse_from_initial_state")
+    @patch("src.scraper.requests.get")
+    def test_does_not_build_results_while_streaming(self, mock_get, mock_parse):
+        """打ち切り判定で商品リストを組み立てないこと（パースは呼び出し側で 1 回だけ）."""
+        page = _load_fixture("search_initial_state.html") + "<div>padding</div>" * 500
+        resp = _streaming_response(page.encode("utf-8"))
+        mock_get.return_value = resp
+
+        html = fetch_search_page("ノニジュース", "pc", stream=True)
+
+        mock_parse.assert_not_called()
+        assert resp.raw.tell() < len(page.encode("utf-8"))
+        assert html.count("padding") < 500
+
+    @patch("src.scraper.requests.get")
+    def test_falls_back_to_full_download(self, mock_get):
+        """マーカーがなければ全体を取得して JSON-LD でパースできること."""
+        page = _load_fixture("search_json_ld.html")
+        mock_get.return_value = _streaming_response(page.encode("utf-8"))
+
+        html = fetch_search_page("ノニジュース", "sp", stream=True)
+
+        assert html == page
+        assert len(parse_search_results(html)) == 3
+
+    @patch("src.scraper.requests.get")
+    def test_unusable_initial_state_reads_json_ld(self, mock_get):
+        """__INITIAL_STATE__ から商品を取得できなければ後続の JSON-LD まで読むこと."""
+        page = (
+            '<script>window.__INITIAL_STATE__ = {"search": {}};</script>'
+            + _load_fixture("search_json_ld.html")
+        )
+        mock_get.return_value = _streaming_response(page.encode("utf-8"))
+
+        html = fetch_search_page("ノニジュース", "pc", stream=True)
+
+        assert html == page
+        assert len(parse_search_results(html)) == 3
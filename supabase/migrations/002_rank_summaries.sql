@@ -0,0 +1,29 @@
+-- ============================================================
+-- 楽天検索順位取得ツール — 順位変動サマリ
+-- collector が毎回の収集後に再計算して上書きする集計テーブル
+-- （D-04 変動フィルタ / D-05 推移グラフ用）
+-- ============================================================
+
+CREATE TABLE rank_tracker.rank_summaries (
+    product_id          uuid NOT NULL REFERENCES rank_tracker.products(id) ON DELETE CASCADE,
+    keyword_id          uuid NOT NULL REFERENCES rank_tracker.keywords(id) ON DELETE CASCADE,
+    device              text NOT NULL CHECK (device IN ('pc', 'sp')),
+    latest_rank         integer,  -- null = 圏外
+    latest_searched_at  timestamptz NOT NULL,
+    deltas              jsonb NOT NULL DEFAULT '{}'::jsonb,  -- {"<収集回数>": 前回順位 - 最新順位}
+    out_of_rank_streak  integer NOT NULL DEFAULT 0,
+    movement            text NOT NULL CHECK (movement IN ('up', 'down', 'flat')),
+    computed_at         timestamptz NOT NULL DEFAULT now(),
+    PRIMARY KEY (product_id, keyword_id, device)
+);
+
+COMMENT ON TABLE rank_tracker.rank_summaries IS '商品×キーワード×デバイスごとの最新順位・変動量・連続圏外回数';
+
+CREATE INDEX idx_rank_summaries_movement
+    ON rank_tracker.rank_summaries (movement, device);
+
+ALTER TABLE rank_tracker.rank_summaries ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Allow all for rank_summaries"
+    ON rank_tracker.rank_summaries FOR ALL
+    USING (true) WITH CHECK (true);
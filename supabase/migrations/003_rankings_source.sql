@@ -0,0 +1,11 @@
+-- ============================================================
+-- 楽天検索順位取得ツール — 順位記録の取得元
+-- オンデマンド収集（M-04 登録直後）の行を定期実行の行と区別し、
+-- 収集回数単位の変動分析（rank_summaries）から除外できるようにする
+-- ============================================================
+
+ALTER TABLE rank_tracker.rankings
+    ADD COLUMN source text NOT NULL DEFAULT 'scheduled'
+        CHECK (source IN ('scheduled', 'on_demand'));
+
+COMMENT ON COLUMN rank_tracker.rankings.source IS '取得元。scheduled = 定期実行, on_demand = 登録直後のオンデマンド収集';